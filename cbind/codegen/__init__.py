@@ -2,7 +2,7 @@
 
 '''Generate ctypes binding from syntax tree.'''
 
-from cbind.codegen.helper import gen_tree_node, gen_record
+from cbind.codegen.helper import gen_tree_node, gen_record, set_type_cache
 from cbind.codegen.helper import make_function_argtypes, make_function_restype
 import cbind.annotations as annotations
 
@@ -23,6 +23,16 @@ class CodeGen:
 
     def __init__(self):
         self.output = None
+        self._saved_type_cache = None
+
+    def enable_type_cache(self, enable):
+        '''Set a fresh global cache of ctypes types, or put back the cache
+        that was set before.'''
+        if enable:
+            self._saved_type_cache = set_type_cache({})
+        else:
+            set_type_cache(self._saved_type_cache)
+            self._saved_type_cache = None
 
     def set_output(self, output):
         '''Set output buffer.'''
@@ -34,17 +44,21 @@ class CodeGen:
 
     def generate_record_definition(self, tree):
         '''Generate definition of record (struct, union, or class).'''
-        declared = tree.get_annotation(annotations.DECLARED, False)
-        gen_record(tree, self.output, declared=declared, declaration=False)
-        tree.annotate(annotations.DECLARED, True)
-        tree.annotate(annotations.DEFINED, True)
+        ann = tree.get_annotations()
+        declared = ann.get(annotations.DECLARED, False)
+        gen_record(tree, self.output, declared=declared, declaration=False,
+                   ann=ann)
+        ann[annotations.DECLARED] = True
+        ann[annotations.DEFINED] = True
 
     def generate_record_forward_decl(self, tree):
         '''Generate forward declaration of record (struct, union, or class).'''
-        if not tree.get_annotation(annotations.REQUIRED, False):
+        ann = tree.get_annotations()
+        if not ann.get(annotations.REQUIRED, False):
             return
-        if not tree.get_annotation(annotations.FORWARD_DECLARATION, False):
+        if not ann.get(annotations.FORWARD_DECLARATION, False):
             return
-        declared = tree.get_annotation(annotations.DECLARED, False)
-        gen_record(tree, self.output, declared=declared, declaration=True)
-        tree.annotate(annotations.DECLARED, True)
+        declared = ann.get(annotations.DECLARED, False)
+        gen_record(tree, self.output, declared=declared, declaration=True,
+                   ann=ann)
+        ann[annotations.DECLARED] = True
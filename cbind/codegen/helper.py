@@ -2,7 +2,9 @@
 
 '''Generate ctypes binding from syntax tree.'''
 
+import functools
 import logging
+from collections import namedtuple
 
 from cbind.cindex import CursorKind, TypeKind
 from cbind.mangler import mangle
@@ -10,21 +12,16 @@ import cbind.annotations as annotations
 import cbind.codegen
 
 
-# Map of clang type to ctypes type
+# Map of clang type to ctypes type (types not listed have no direct
+# ctypes counterpart)
 C_TYPE_MAP = {
-    TypeKind.INVALID:           None,
-    TypeKind.UNEXPOSED:         None,
-    TypeKind.VOID:              None,
     TypeKind.BOOL:              'c_bool',
     TypeKind.CHAR_U:            'c_ubyte',
     TypeKind.UCHAR:             'c_ubyte',
-    TypeKind.CHAR16:            None,
-    TypeKind.CHAR32:            None,
     TypeKind.USHORT:            'c_ushort',
     TypeKind.UINT:              'c_uint',
     TypeKind.ULONG:             'c_ulong',
     TypeKind.ULONGLONG:         'c_ulonglong',
-    TypeKind.UINT128:           None,
     TypeKind.CHAR_S:            'c_char',
     TypeKind.SCHAR:             'c_char',
     TypeKind.WCHAR:             'c_wchar',
@@ -32,33 +29,23 @@ C_TYPE_MAP = {
     TypeKind.INT:               'c_int',
     TypeKind.LONG:              'c_long',
     TypeKind.LONGLONG:          'c_longlong',
-    TypeKind.INT128:            None,
     TypeKind.FLOAT:             'c_float',
     TypeKind.DOUBLE:            'c_double',
     TypeKind.LONGDOUBLE:        'c_longdouble',
-    TypeKind.NULLPTR:           None,
-    TypeKind.OVERLOAD:          None,
-    TypeKind.DEPENDENT:         None,
-    TypeKind.OBJCID:            None,
-    TypeKind.OBJCCLASS:         None,
-    TypeKind.OBJCSEL:           None,
-    TypeKind.COMPLEX:           None,
-    TypeKind.POINTER:           None,
-    TypeKind.BLOCKPOINTER:      None,
-    TypeKind.LVALUEREFERENCE:   None,
-    TypeKind.RVALUEREFERENCE:   None,
-    TypeKind.RECORD:            None,
-    TypeKind.ENUM:              None,
-    TypeKind.TYPEDEF:           None,
-    TypeKind.OBJCINTERFACE:     None,
-    TypeKind.OBJCOBJECTPOINTER: None,
-    TypeKind.FUNCTIONNOPROTO:   None,
-    TypeKind.FUNCTIONPROTO:     None,
-    TypeKind.CONSTANTARRAY:     None,
-    TypeKind.INCOMPLETEARRAY:   None,
-    TypeKind.VARIABLEARRAY:     None,
-    TypeKind.DEPENDENTSIZEDARRAY: None,
-    TypeKind.VECTOR:            None,
+}
+
+# C_TYPE_MAP flattened into a table indexed by the value of TypeKind
+_C_TYPE_TABLE = [None] * (max(kind.value for kind in C_TYPE_MAP) + 1)
+for _kind, _c_type in C_TYPE_MAP.items():
+    _C_TYPE_TABLE[_kind.value] = _c_type
+_C_TYPE_TABLE = tuple(_C_TYPE_TABLE)
+del _kind, _c_type
+
+# Map of clang type to ctypes type of pointer to it
+POINTER_TYPE_MAP = {
+    TypeKind.CHAR_S:            'c_char_p',
+    TypeKind.VOID:              'c_void_p',
+    TypeKind.WCHAR:             'c_wchar_p',
 }
 
 # Typedef'ed types of stddef.h, etc.
@@ -71,105 +58,210 @@ BUILTIN_TYPEDEFS = {
 # Indent by 4 speces
 INDENT = '    '
 
+# Bound format methods of class definition with and without mix-in classes
+_make_class_with_mixin = (
+    'class {name}({mixin}, {base}):\n' + INDENT + 'pass\n').format
+_make_class = ('class {name}({base}):\n' + INDENT + 'pass\n').format
+
+# Bound format methods of enum constants, keyed by format string
+_ENUM_FORMATTERS = {}
+
 # Name of the library
 LIBNAME = '_lib'
 
+# Field of a POD; offset is in bits and bitfield_width is None if the field is
+# not a bit field.  An unnamed bit field has no offset (libclang looks fields
+# up by name); it is bound as a padding field, or skipped if it is zero-width.
+PodField = namedtuple('PodField', 'name c_type offset bitfield_width')
+
+# Name format of padding fields of unnamed bit fields
+_make_unnamed_bitfield_name = '_unnamed_bitfield_{0}'.format
+
+# Cache of ctypes binding of clang types, keyed by the identity of clang
+# types.  It is a module global, like the CodeGen class flags, that is set
+# only for the duration of code generation (see CodeGen.enable_type_cache) and
+# is None otherwise, because syntax tree passes may still rename nodes before
+# that.  It is not thread safe.
+_TYPE_CACHE = None
+
 
 def gen_tree_node(tree, output):
     '''Generate ctypes binding from a AST node.'''
-    if not tree.get_annotation(annotations.REQUIRED, False):
+    ann = tree.get_annotations()
+    if not ann.get(annotations.REQUIRED, False):
         return
     # Do not define a node twice.
-    if tree.get_annotation(annotations.DEFINED, False):
+    if ann.get(annotations.DEFINED, False):
         return
-    declaration = False
-    if tree.kind == CursorKind.TYPEDEF_DECL:
-        _make_typedef(tree, output)
-    elif tree.kind == CursorKind.FUNCTION_DECL:
-        _make_function(tree, output)
-    elif tree.is_user_defined_pod_decl():
-        declared = tree.get_annotation(annotations.DECLARED, False)
-        declaration = not tree.is_definition()
-        gen_record(tree, output, declared=declared, declaration=declaration)
-    elif tree.kind == CursorKind.ENUM_DECL and tree.is_definition():
-        _make_enum(tree, output)
-    elif tree.kind == CursorKind.VAR_DECL:
-        _make_var(tree, output)
-    else:
+    generate = _NODE_GENERATORS.get(tree.kind)
+    if generate is None:
+        return
+    annotation = generate(tree, output, ann)
+    if annotation is None:
         return
     output.write('\n')
+    ann[annotation] = True
+
+
+def _gen_typedef(tree, output, _):
+    '''Generate typedef node; return the annotation to be set.'''
+    _make_typedef(tree, output)
+    return annotations.DEFINED
+
+
+def _gen_function(tree, output, ann):
+    '''Generate function node; return the annotation to be set.'''
+    if not tree.is_external_linkage():
+        return None
+    _make_function(tree, output, ann=ann)
+    return annotations.DEFINED
+
+
+def _gen_record(tree, output, ann):
+    '''Generate POD node; return the annotation to be set.'''
+    declared = ann.get(annotations.DECLARED, False)
+    declaration = not tree.is_definition()
+    gen_record(tree, output, declared=declared, declaration=declaration,
+               ann=ann)
     if declaration:
-        tree.annotate(annotations.DECLARED, True)
-    else:
-        tree.annotate(annotations.DEFINED, True)
+        return annotations.DECLARED
+    return annotations.DEFINED
+
+
+def _gen_enum(tree, output, ann):
+    '''Generate enum node; return the annotation to be set.'''
+    if not tree.is_definition():
+        return None
+    _make_enum(tree, output, ann=ann)
+    return annotations.DEFINED
+
+
+def _gen_var(tree, output, _):
+    '''Generate variable node; return the annotation to be set.'''
+    _make_var(tree, output)
+    return annotations.DEFINED
 
 
-def gen_record(tree, output, declared=False, declaration=False):
+# Map of cursor kind to generator of that kind of AST node
+_NODE_GENERATORS = {
+    CursorKind.TYPEDEF_DECL:    _gen_typedef,
+    CursorKind.FUNCTION_DECL:   _gen_function,
+    CursorKind.STRUCT_DECL:     _gen_record,
+    CursorKind.CLASS_DECL:      _gen_record,
+    CursorKind.UNION_DECL:      _gen_record,
+    CursorKind.ENUM_DECL:       _gen_enum,
+    CursorKind.VAR_DECL:        _gen_var,
+}
+
+
+def gen_record(tree, output, declared=False, declaration=False, ann=None):
     '''Generate ctypes binding of a POD definition.'''
     cls_name = tree.name
     if not declared:
-        _make_pod_header(tree, cls_name, output)
+        if ann is None:
+            ann = tree.get_annotations()
+        _make_pod_header(tree, cls_name, output, ann)
     if not declaration:
-        _make_pod_body(tree, cls_name, output)
+        fields = _collect_pod_fields(tree)
+        _make_pod_body(tree, cls_name, fields, output)
         if cbind.codegen.CodeGen.ENABLE_CPP:
             if tree.kind != CursorKind.UNION_DECL:
                 for method in tree.get_method():
                     _make_method(method, cls_name, output)
         if cbind.codegen.CodeGen.ASSERT_LAYOUT:
-            _make_layout_assertion(tree, cls_name, output)
+            _make_layout_assertion(tree, cls_name, fields, output)
+
+
+def set_type_cache(cache):
+    '''Set the global cache of ctypes types (None disables it); return the
+    cache that was set before.'''
+    global _TYPE_CACHE  # pylint: disable=W0603
+    old_cache, _TYPE_CACHE = _TYPE_CACHE, cache
+    return old_cache
+
+
+def _cache_type(make):
+    '''Memoize ctypes binding of a clang type.'''
+    @functools.wraps(make)
+    def wrapper(type_):
+        '''Look up the cache before making ctypes binding.'''
+        if _TYPE_CACHE is None:
+            return make(type_)
+        key = (make, type_.get_identity())
+        c_type = _TYPE_CACHE.get(key)
+        if c_type is None:
+            c_type = _TYPE_CACHE[key] = make(type_)
+        return c_type
+    return wrapper
 
 
+@_cache_type
 def _make_type(type_):
     '''Generate ctypes binding of a clang type.'''
-    c_type = None
+    kind = type_.kind
+    if kind.value < len(_C_TYPE_TABLE):
+        c_type = _C_TYPE_TABLE[kind.value]
+        if c_type is not None:
+            return c_type
+    make = _TYPE_MAKERS.get(kind)
+    if make is not None:
+        return make(type_)
     if type_.is_user_defined_type():
-        tree = type_.get_declaration()
-        c_type = tree.name
-    elif type_.kind == TypeKind.TYPEDEF:
-        tree = type_.get_declaration()
-        c_type = (BUILTIN_TYPEDEFS.get(tree.name) or
-                  _make_type(type_.get_canonical()))
-    elif type_.kind == TypeKind.CONSTANTARRAY:
-        # TODO(clchiou): Make parentheses context-sensitive
-        element_type = _make_type(type_.get_array_element_type())
-        c_type = '(%s * %d)' % (element_type, type_.get_array_size())
-    elif type_.kind == TypeKind.INCOMPLETEARRAY:
-        pointee_type = type_.get_array_element_type()
-        c_type = _make_pointer_type(pointee_type=pointee_type)
-    elif type_.kind == TypeKind.POINTER:
-        c_type = _make_pointer_type(pointer_type=type_)
-    else:
-        c_type = C_TYPE_MAP.get(type_.kind)
-    if c_type is None:
-        raise TypeError('Unsupported TypeKind: %s' % type_.kind)
+        return type_.get_declaration().name
+    raise TypeError('Unsupported TypeKind: %s' % kind)
+
+
+def _make_typedef_type(type_):
+    '''Generate ctypes binding of a typedef'ed type.'''
+    tree = type_.get_declaration()
+    return (BUILTIN_TYPEDEFS.get(tree.name) or
+            _make_type(type_.get_canonical()))
+
+
+def _make_array_type(type_):
+    '''Generate ctypes binding of a constant array.'''
+    # Unwrap nested arrays in a loop rather than recursing per dimension.
+    array_sizes = []
+    while type_.kind == TypeKind.CONSTANTARRAY:
+        array_sizes.append(str(type_.get_array_size()))
+        type_ = type_.get_array_element_type()
+    # TODO(clchiou): Make parentheses context-sensitive
+    c_type = _make_type(type_)
+    for array_size in reversed(array_sizes):
+        c_type = '(' + c_type + ' * ' + array_size + ')'
     return c_type
 
 
-def _make_pointer_type(pointer_type=None, pointee_type=None):
+def _make_incomplete_array_type(type_):
+    '''Generate ctypes binding of an incomplete array.'''
+    return _make_pointer_type(type_.get_array_element_type())
+
+
+def _make_pointer_to_type(type_):
+    '''Generate ctypes binding of a pointer type.'''
+    return _make_pointer_type(type_.get_pointee())
+
+
+@_cache_type
+def _make_pointer_type(pointee_type):
     '''Generate ctypes binding of a pointer.'''
-    if pointer_type:
-        pointee_type = pointer_type.get_pointee()
+    kind = pointee_type.kind
+    c_type = POINTER_TYPE_MAP.get(kind)
+    if c_type is not None:
+        return c_type
     canonical = pointee_type.get_canonical()
-    decl = pointee_type.get_declaration()
-    if pointee_type.kind == TypeKind.CHAR_S:
-        c_type = 'c_char_p'
-    elif pointee_type.kind == TypeKind.VOID:
-        c_type = 'c_void_p'
-    elif (pointee_type.kind == TypeKind.TYPEDEF and
-            canonical.kind == TypeKind.VOID):
+    if kind == TypeKind.TYPEDEF:
         # Handle special case "typedef void foo;"
-        c_type = 'c_void_p'
-    elif (pointee_type.kind == TypeKind.WCHAR or
-            (pointee_type.kind == TypeKind.TYPEDEF and
-             decl.name == 'wchar_t')):
-        c_type = 'c_wchar_p'
-    elif canonical.kind == TypeKind.FUNCTIONPROTO:
-        c_type = _make_function_pointer(canonical)
-    else:
-        c_type = 'POINTER(%s)' % _make_type(pointee_type)
-    return c_type
+        if canonical.kind == TypeKind.VOID:
+            return 'c_void_p'
+        if pointee_type.get_declaration().name == 'wchar_t':
+            return 'c_wchar_p'
+    if canonical.kind == TypeKind.FUNCTIONPROTO:
+        return _make_function_pointer(canonical)
+    return 'POINTER(%s)' % _make_type(pointee_type)
 
 
+@_cache_type
 def _make_function_pointer(type_):
     '''Generate ctypes binding of a function pointer.'''
     # ctypes does not support variadic function pointer...
@@ -178,7 +270,7 @@ def _make_function_pointer(type_):
         return 'c_void_p'
     args = type_.get_argument_types()
     if len(args) > 0:
-        argtypes = ', %s' % ', '.join(_make_type(arg) for arg in args)
+        argtypes = ', %s' % ', '.join([_make_type(arg) for arg in args])
     else:
         argtypes = ''
     result_type = type_.get_result()
@@ -189,6 +281,15 @@ def _make_function_pointer(type_):
     return 'CFUNCTYPE(%s%s)' % (restype, argtypes)
 
 
+# Map of clang type kind to function generating its ctypes binding
+_TYPE_MAKERS = {
+    TypeKind.TYPEDEF:           _make_typedef_type,
+    TypeKind.CONSTANTARRAY:     _make_array_type,
+    TypeKind.INCOMPLETEARRAY:   _make_incomplete_array_type,
+    TypeKind.POINTER:           _make_pointer_to_type,
+}
+
+
 def _make_typedef(tree, output):
     '''Generate ctypes binding of a typedef statement.'''
     type_ = tree.underlying_typedef_type
@@ -198,10 +299,12 @@ def _make_typedef(tree, output):
     output.write('%s = %s\n' % (tree.name, _make_type(type_)))
 
 
-def _make_function(tree, output, cls_name=None):
+def _make_function(tree, output, cls_name=None, ann=None):
     '''Generate ctypes binding of a function declaration.'''
     if not tree.is_external_linkage():
         return
+    if ann is None:
+        ann = tree.get_annotations()
 
     cxx_method = tree.kind == CursorKind.CXX_METHOD
     if cxx_method:
@@ -210,28 +313,29 @@ def _make_function(tree, output, cls_name=None):
     else:
         name = tree.name
         symbol_name = tree.spelling
-    output.write('{0} = {1}.{2}\n'.format(name, LIBNAME, symbol_name))
+    lines = ['{0} = {1}.{2}\n'.format(name, LIBNAME, symbol_name)]
 
-    argtypes = ', '.join(make_function_argtypes(tree))
+    argtypes = make_function_argtypes(tree)
     if argtypes:
-        output.write('%s.argtypes = [%s]\n' % (name, argtypes))
+        lines.append('%s.argtypes = [%s]\n' % (name, ', '.join(argtypes)))
     if tree.result_type.kind != TypeKind.VOID:
         restype = make_function_restype(tree)
-        output.write('%s.restype = %s\n' % (name, restype))
-    errcheck = tree.get_annotation(annotations.ERRCHECK, False)
+        lines.append('%s.restype = %s\n' % (name, restype))
+    errcheck = ann.get(annotations.ERRCHECK, False)
     if errcheck:
-        output.write('%s.errcheck = %s\n' % (name, errcheck))
+        lines.append('%s.errcheck = %s\n' % (name, errcheck))
 
-    method = tree.get_annotation(annotations.METHOD, False)
+    method = ann.get(annotations.METHOD, False)
     if cxx_method:
         if tree.is_static_method():
             wrapper = 'staticmethod'
         else:
             wrapper = '_CtypesFunctor'
-        output.write('{name} = {wrapper}({name})\n'.format(
+        lines.append('{name} = {wrapper}({name})\n'.format(
             name=name, wrapper=wrapper))
     elif method:
-        output.write('%s = _CtypesFunctor(%s)\n' % (method, name))
+        lines.append('%s = _CtypesFunctor(%s)\n' % (method, name))
+    output.write(''.join(lines))
 
 
 def make_function_argtypes(tree):
@@ -248,74 +352,115 @@ def make_function_restype(tree):
     return _make_type(tree.result_type)
 
 
-def _make_pod_header(tree, name, output):
+def _make_pod_header(tree, name, output, ann):
     '''Generate the 'class ...' part of POD.'''
     if tree.kind == CursorKind.UNION_DECL:
         pod_kind = 'Union'
     else:
         pod_kind = 'Structure'
-    mixin = tree.get_annotation(annotations.MIXIN, ())
+    mixin = ann.get(annotations.MIXIN, ())
     if mixin:
-        fmt = 'class {name}({mixin}, {kind}):\n{indent}pass\n'
+        output.write(_make_class_with_mixin(name=name, base=pod_kind,
+                                            mixin=', '.join(mixin)))
     else:
-        fmt = 'class {name}({kind}):\n{indent}pass\n'
-    output.write(fmt.format(name=name, kind=pod_kind, indent=INDENT,
-                            mixin=', '.join(mixin)))
+        output.write(_make_class(name=name, base=pod_kind))
+
+
+def _collect_pod_fields(tree):
+    '''Collect fields of POD in one pass over the syntax tree.'''
+    fields = []
+    get_offset = tree.type.get_offset
+    num_unnamed_bitfields = 0
+    for field in tree.get_field_declaration():
+        if field.is_bitfield():
+            bitfield_width = field.get_bitfield_width()
+        else:
+            bitfield_width = None
+        if bitfield_width is not None and not field.original_name:
+            if bitfield_width:
+                name = _make_unnamed_bitfield_name(num_unnamed_bitfields)
+                num_unnamed_bitfields += 1
+            else:
+                # ctypes does not take zero-width bit fields.
+                logging.info('Could not bind zero-width bit field of %s',
+                             tree.name)
+                name = None
+            fields.append(PodField(name=name,
+                                   c_type=_make_type(field.type),
+                                   offset=None,
+                                   bitfield_width=bitfield_width))
+            continue
+        offset = get_offset(field.original_name.encode())
+        fields.append(PodField(name=field.name,
+                               c_type=_make_type(field.type),
+                               offset=offset,
+                               bitfield_width=bitfield_width))
+    return fields
 
 
-def _make_pod_body(tree, name, output):
+def _make_pod_body(tree, name, fields, output):
     '''Generate the body part of POD.'''
-    fields = tuple(tree.get_field_declaration())
     if not fields:
         return
     begin = '%s.' % name
     field_stmt = '%s_fields_ = [' % begin
-    indent = ' ' * len(field_stmt)
-    output.write(field_stmt)
-    offset = tree.type.get_offset(fields[0].original_name.encode()) / 8
+    separator = ',\n' + ' ' * len(field_stmt)
+    parts = [field_stmt]
+    offset = (fields[0].offset or 0) // 8
     if offset != 0:
         # Add padding here; we probably encounter a vtable...
-        output.write('(\'__python_struct_padding\', c_char * %d)' % offset)
-        first = False
-    else:
-        first = True
+        parts.append('(\'__python_struct_padding\', c_char * %d)' % offset)
+        parts.append(separator)
+    is_union = tree.kind == CursorKind.UNION_DECL
     last_offset = -1  # Offsets of struct and class should be increasing
-    for field in fields:
-        offset = tree.type.get_offset(field.original_name.encode())
-        assert tree.kind == CursorKind.UNION_DECL or last_offset < offset
-        last_offset = offset
-        if not first:
-            output.write(',\n%s' % indent)
-        _make_pod_field(field, output)
-        first = False
-    output.write(']\n')
-
-
-def _make_pod_field(field, output):
-    '''Generate the field part of POD.'''
-    blob = ['\'%s\'' % field.name, _make_type(field.type)]
-    if field.is_bitfield():
-        blob.append(str(field.get_bitfield_width()))
-    field_stmt = '(%s)' % ', '.join(blob)
-    output.write('%s' % field_stmt)
-
-
-def _make_layout_assertion(tree, cls_name, output):
+    # This is a flat loop, as it runs per field; concatenate strings rather
+    # than formatting them.
+    for field_name, c_type, offset, bitfield_width in fields:
+        if offset is None:
+            if not bitfield_width:
+                continue
+        else:
+            assert is_union or last_offset < offset
+            last_offset = offset
+        if bitfield_width is None:
+            parts.append('(' + repr(field_name) + ', ' + c_type + ')')
+        else:
+            parts.append('(' + repr(field_name) + ', ' + c_type + ', ' +
+                         str(bitfield_width) + ')')
+        parts.append(separator)
+    parts[-1] = ']\n'
+    output.write(''.join(parts))
+
+
+def _make_layout_assertion(tree, cls_name, fields, output):
     '''Generate assertions of struct layout for ABI compatibility.'''
     if tree.kind == CursorKind.UNION_DECL:
         return
+    begin = cls_name + '.'
+    parts = []
     first_bitfield_offset = None
-    for field in tree.get_field_declaration():
-        offset = tree.type.get_offset(field.original_name.encode()) / 8
-        if field.is_bitfield():
+    for field in fields:
+        if field.offset is None:
+            # A zero-width bit field ends a run of bit fields, and the offset
+            # of a run that starts with padding is unknown (-1).
+            if not field.bitfield_width:
+                first_bitfield_offset = None
+            elif first_bitfield_offset is None:
+                first_bitfield_offset = -1
+            continue
+        offset = field.offset // 8
+        if field.bitfield_width is not None:
             if first_bitfield_offset is None:
                 first_bitfield_offset = offset
             else:
                 offset = first_bitfield_offset
+            if offset < 0:
+                continue
         else:
             first_bitfield_offset = None
-        assertion = '%s.%s.offset == %d' % (cls_name, field.name, offset)
-        output.write('assert %s, \'%s\'\n' % (assertion, assertion))
+        assertion = begin + field.name + '.offset == ' + str(offset)
+        parts.append('assert ' + assertion + ', ' + repr(assertion) + '\n')
+    output.write(''.join(parts))
 
 
 def _make_method(method, cls_name, output):
@@ -323,32 +468,34 @@ def _make_method(method, cls_name, output):
     _make_function(method, output, cls_name=cls_name)
 
 
-def _make_enum(tree, output):
+def _make_enum(tree, output, ann=None):
     '''Generate ctypes binding of a enum definition.'''
-    if tree.name:
-        enum_name = tree.name
-        enum_type = _make_type(tree.enum_type)
-    else:
-        enum_name = ''
-        enum_type = _make_type(tree.enum_type)
-    if tree.name:
-        mixin = tree.get_annotation(annotations.MIXIN, ())
+    enum_name = tree.name
+    enum_type = _make_type(tree.enum_type)
+    lines = []
+    if enum_name:
+        if ann is None:
+            ann = tree.get_annotations()
+        mixin = ann.get(annotations.MIXIN, ())
         if mixin:
-            fmt = 'class {name}({mixin}, {type}):\n{indent}pass\n'
+            lines.append(_make_class_with_mixin(name=enum_name,
+                                                base=enum_type,
+                                                mixin=', '.join(mixin)))
         else:
-            fmt = 'class {name}({type}):\n{indent}pass\n'
-        output.write(fmt.format(name=enum_name, indent=INDENT,
-                                type=enum_type, mixin=', '.join(mixin)))
+            lines.append(_make_class(name=enum_name, base=enum_type))
     for enum in tree.get_children():
-        if not enum.get_annotation(annotations.REQUIRED, False):
+        enum_ann = enum.get_annotations()
+        if not enum_ann.get(annotations.REQUIRED, False):
             continue
-        fmt = enum.get_annotation(annotations.ENUM,
-                                  '{enum_field} = {enum_value}')
-        output.write(fmt.format(enum_name=enum_name,
-                                enum_type=enum_type,
-                                enum_field=enum.name,
-                                enum_value=enum.enum_value))
-        output.write('\n')
+        fmt = enum_ann.get(annotations.ENUM, '{enum_field} = {enum_value}')
+        make_enum = _ENUM_FORMATTERS.get(fmt)
+        if make_enum is None:
+            make_enum = _ENUM_FORMATTERS[fmt] = (fmt + '\n').format
+        lines.append(make_enum(enum_name=enum_name,
+                               enum_type=enum_type,
+                               enum_field=enum.name,
+                               enum_value=enum.enum_value))
+    output.write(''.join(lines))
 
 
 def _make_var(tree, output):
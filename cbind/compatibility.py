@@ -10,6 +10,8 @@ __all__ = ['StringIO']
 if sys.version_info.major == 3:
     from io import StringIO
     decode_str = bytes.decode   # pylint: disable=C0103
+    intern_str = sys.intern     # pylint: disable=C0103
 else:
     from cStringIO import StringIO
     decode_str = str            # pylint: disable=C0103
+    intern_str = intern         # pylint: disable=C0103
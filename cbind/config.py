@@ -167,10 +167,10 @@ class SyntaxTreeMatcher(namedtuple('SyntaxTreeMatcher', '''
     @check_matcher_data(('name', 'rename'))
     def do_rename(self, tree):
         '''Rename tree.'''
-        new_name = tree.name
+        old_name = new_name = tree.name
         for pattern, replace in self.rename:
             new_name = pattern.sub(replace, new_name)
-        if new_name == tree.name:
+        if new_name == old_name:
             return False
         tree.annotate(annotations.NAME, new_name)
         return True
@@ -4,6 +4,7 @@
 
 import functools
 from cbind.codegen import CodeGen
+from cbind.compatibility import StringIO
 from cbind.config import SyntaxTreeMatcher
 from cbind.passes import (custom_pass,
                           scan_required_nodes,
@@ -63,6 +64,11 @@ class CtypesBindingGenerator:
         self.codegen = CodeGen()
         self.syntax_tree_forest = SyntaxTreeForest()
         self._config = {}
+        self._va_list_tag = None
+        # Whether each tree of the forest needs forward declarations; this
+        # is not an annotation of the root because the roots of all
+        # translation units share the same hash (and annotations).
+        self._use_forward_decl = []
 
     def config(self, config_data):
         '''Configure the generator.'''
@@ -92,8 +98,11 @@ class CtypesBindingGenerator:
                                                     contents=contents,
                                                     args=args)
         scan_required_nodes(syntax_tree, check_required)
-        scan_forward_decl(syntax_tree)
+        self._use_forward_decl.append(scan_forward_decl(syntax_tree))
         scan_va_list_tag(syntax_tree)
+        if self._va_list_tag is None:
+            self._va_list_tag = syntax_tree.get_annotation(
+                annotations.USE_VA_LIST_TAG, None)
         scan_anonymous_pod(syntax_tree)
 
         # Since now tree is "complete", we may attach information to it.
@@ -127,19 +136,32 @@ class CtypesBindingGenerator:
     def generate(self, output):
         '''Generate ctypes binding.'''
         self.codegen.set_output(output)
+        self.codegen.enable_type_cache(True)
+        try:
+            self._generate(output)
+        finally:
+            self.codegen.enable_type_cache(False)
+
+    def _generate(self, output):
+        '''Generate ctypes binding of all syntax trees.'''
         if 'method' in self._config:
             output.write(METHOD_DESCRIPTOR)
-        for syntax_tree in self.syntax_tree_forest:
-            va_list_tag = syntax_tree.get_annotation(
-                annotations.USE_VA_LIST_TAG, False)
-            if va_list_tag:
-                self.codegen.generate_record_definition(va_list_tag)
-                output.write('\n')
-                break
-        for syntax_tree in self.syntax_tree_forest:
-            syntax_tree.traverse(
-                preorder=self.codegen.generate_record_forward_decl,
-                postorder=self.codegen.generate)
+        if self._va_list_tag:
+            self.codegen.generate_record_definition(self._va_list_tag)
+            output.write('\n')
+        for syntax_tree, use_forward_decl in zip(self.syntax_tree_forest,
+                                                 self._use_forward_decl):
+            # Buffer the many small writes and flush them once per tree.
+            buf = StringIO()
+            self.codegen.set_output(buf)
+            if use_forward_decl:
+                preorder = self.codegen.generate_record_forward_decl
+            else:
+                preorder = None
+            syntax_tree.traverse(preorder=preorder,
+                                 postorder=self.codegen.generate)
+            output.write(buf.getvalue())
+        self.codegen.set_output(output)
 
 
 def check_locally_defined(tree, path):
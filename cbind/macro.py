@@ -109,19 +109,18 @@ class MacroGenerator:
         src.write('};\n')
         syntax_tree = SyntaxTree.parse('input.c', contents=src.getvalue(),
                                        args=args)
-        return cls._find_enums(syntax_tree)
+        return cls._find_enums(syntax_tree, 'input.c')
 
     @staticmethod
-    def _find_enums(syntax_tree):
-        '''Find enums of translation unit.'''
-        enum_trees = []
-
-        def search_enum_def(tree):
-            '''Test if the tree is an enum definition.'''
-            if tree.kind == CursorKind.ENUM_DECL and tree.is_definition():
-                enum_trees.append(tree)
-
-        syntax_tree.traverse(search_enum_def)
+    def _find_enums(syntax_tree, path):
+        '''Find enums defined at file scope of path.'''
+        # The generated enum is at file scope, so there is no need to walk
+        # the whole translation unit, nor the enums of c_path.
+        enum_trees = [tree for tree in syntax_tree.get_children()
+                      if tree.kind == CursorKind.ENUM_DECL and
+                      tree.location.file and
+                      tree.location.file.name == path and
+                      tree.is_definition()]
         # I can't think of any real world scenarios that
         # the generated enum_trees would be empty...
         assert enum_trees
@@ -162,14 +161,17 @@ class MacroGenerator:
 
     def generate(self, output):
         '''Generate macro constants.'''
+        # Translate into a buffer and write the output file once.
+        buf = StringIO()
         for symbol in self.symbol_table.values():
             if not symbol:
                 continue
-            output.write('%s = ' % symbol.name)
+            buf.write('%s = ' % symbol.name)
             if symbol.args is not None:
-                output.write('lambda %s: ' % ', '.join(symbol.args))
-            symbol.expr.translate(output)
-            output.write('\n')
+                buf.write('lambda %s: ' % ', '.join(symbol.args))
+            symbol.expr.translate(buf)
+            buf.write('\n')
+        output.write(buf.getvalue())
 
 
 class MacroSymbol(namedtuple('MacroSymbol', 'name args body expr')):
@@ -178,17 +180,12 @@ class MacroSymbol(namedtuple('MacroSymbol', 'name args body expr')):
     # pylint: disable=W0232,E1101
 
     REGEX_DEFINE = re.compile(r'\s*#\s*define\s+(\w+)')
-    REGEX_ARGUMENTS = re.compile(r'''
-            \(
-                \s*
-                (
-                    \w+
-                    (?:
-                        \s*,\s*\w+
-                    )*
-                )?
-                \s*
-            \)''', re.VERBOSE)
+    REGEX_EXPANDED = re.compile(r'^[^\S\n]*%s.([^ \n]*)( .*)?$' % _MAGIC,
+                                re.MULTILINE)
+    # Match the argument list loosely (no nested quantifiers to backtrack
+    # on) and validate the names after splitting it.
+    REGEX_ARGUMENTS = re.compile(r'\(([\w\s,.]*)\)')
+    REGEX_ARGUMENT_NAME = re.compile(r'\w+$')
 
     @classmethod
     def process(cls, c_path, clang_args, stderr):
@@ -214,19 +211,13 @@ class MacroSymbol(namedtuple('MacroSymbol', 'name args body expr')):
         if proc.returncode != 0:
             raise MacroException('clang preprocessor returns %d' %
                                  proc.returncode)
-        macros = StringIO(macros)
-        # Parse preprocessor output
-        for define_line in macros:
-            define_line = define_line.lstrip()  # remove leading spaces
-            if not define_line.startswith(_MAGIC):
-                continue
-            sep = define_line.find(' ')
-            name = define_line[len(_MAGIC) + 1:sep]  # sep == -1 is okay here!
-            symbol = candidates[name]
-            if sep != -1:
-                body = define_line[sep:].strip()
-            else:
-                body = None
+        # Parse preprocessor output; most of it is the expanded headers, so
+        # let the regex engine skip to the lines we generated.
+        for match in cls.REGEX_EXPANDED.finditer(macros):
+            symbol = candidates[match.group(1)]
+            body = match.group(2)
+            if body is not None:
+                body = body.strip()
             yield cls(name=symbol.name, args=symbol.args, body=body, expr=None)
 
     @classmethod
@@ -235,23 +226,45 @@ class MacroSymbol(namedtuple('MacroSymbol', 'name args body expr')):
         candidates = OrderedDict()
         with open(c_path) as c_src:
             for c_src_line in c_src:
+                # Most lines are not directives; skip them before matching.
+                if '#' not in c_src_line:
+                    continue
                 match_name = cls.REGEX_DEFINE.match(c_src_line)
                 if not match_name:
                     continue
                 name = match_name.group(1)
                 args = cls.REGEX_ARGUMENTS.match(c_src_line[match_name.end():])
                 if args:
-                    args = args.group(1)
-                    if args:
-                        args = tuple(arg.strip() for arg in args.split(','))
-                    else:
-                        args = ()
-                else:
-                    args = None
+                    args = cls._split_arguments(args.group(1))
+                    if args is None:
+                        logging.info('Could not parse arguments of macro: %s',
+                                     c_src_line.strip())
+                        continue
+                elif c_src_line.startswith('(', match_name.end()):
+                    # A function-like macro is not an object-like one even if
+                    # we could not match its argument list.
+                    logging.info('Could not parse arguments of macro: %s',
+                                 c_src_line.strip())
+                    continue
                 candidate = cls(name=name, args=args, body=None, expr=None)
                 candidates[name] = candidate
         return candidates
 
+    @classmethod
+    def _split_arguments(cls, args_list):
+        '''Split argument list; return None if it is malformed or variadic.'''
+        # "()" and "( )" are both an empty argument list.
+        if not args_list.strip():
+            return ()
+        args = tuple(arg.strip() for arg in args_list.split(','))
+        # Each argument must be exactly one name, which rules out an empty
+        # argument (as of a trailing comma) and variadic "..." or "args...",
+        # which a lambda could not take anyway.
+        for arg in args:
+            if not cls.REGEX_ARGUMENT_NAME.match(arg):
+                return None
+        return args
+
     @classmethod
     def set_expr(cls, symbol, expr):
         '''Add expr to a MacroSymbol.'''
@@ -294,6 +307,13 @@ class Parser:
         ('*', '/', '%'),
     )
 
+    # Map each binary operator to its level in the table above (1 is the
+    # loosest binding).
+    BINARY_OPERATOR_LEVEL = dict(
+        (binop, level)
+        for level, binops in enumerate(BINARY_OPERATOR_PRECEDENCE, 1)
+        for binop in (binops if isinstance(binops, tuple) else (binops,)))
+
     def __init__(self):
         '''Initialize the object.'''
         self._tokens = None
@@ -372,7 +392,7 @@ class Parser:
 
     def _cond_expr(self):
         '''Parse conditional expression.'''
-        cond = self._binop_expr(self.BINARY_OPERATOR_PRECEDENCE)
+        cond = self._binop_expr(1)
         qmark = self._may_match((Token.MISC, '?'))
         if not qmark:
             return cond
@@ -382,20 +402,21 @@ class Parser:
         this = Token(kind=Token.TRIOP, spelling='?:')
         return Expression(this=this, children=(cond, true, false))
 
-    def _binop_expr(self, binops):
-        '''Parse binary operator expression.'''
-        if not binops:
-            return self._uniop_expr()
-        left = self._binop_expr(binops[1:])
-        if isinstance(binops[0], tuple):
-            match_op = (Token.BINOP,) + binops[0]
-        else:
-            match_op = (Token.BINOP, binops[0])
-        this = self._may_match(match_op)
-        if not this:
-            return left
-        right = self._binop_expr(binops)
-        return Expression(this=this, children=(left, right))
+    def _binop_expr(self, min_level):
+        '''Parse binary operator expression by precedence climbing.'''
+        left = self._uniop_expr()
+        while True:
+            this = self._may_match((Token.BINOP,))
+            if not this:
+                return left
+            level = self.BINARY_OPERATOR_LEVEL.get(this.spelling)
+            if level is None or level < min_level:
+                self._putback(this)
+                return left
+            # Operators of the same level nest to the right, as they always
+            # have; the translated Python reads the same either way.
+            right = self._binop_expr(level)
+            left = Expression(this=this, children=(left, right))
 
     def _uniop_expr(self):
         '''Parse uniary operator expression.'''
@@ -448,6 +469,9 @@ class Expression(namedtuple('Expression', 'this children')):
 
     # pylint: disable=W0232,E1101
 
+    # One is created per token/node; do not give each a __dict__.
+    __slots__ = ()
+
     def traverse(self, func):
         '''Traverse syntax tree.'''
         for child in self.children:
@@ -456,40 +480,55 @@ class Expression(namedtuple('Expression', 'this children')):
 
     def translate(self, output):
         '''Translate C expression to Python codes.'''
-        if self.this.kind == Token.FUNCTION:
-            self.children[0].translate(output)
-            output.write('(')
-            first = True
-            for child in self.children[1:]:
-                if not first:
-                    output.write(', ')
-                child.translate(output)
-                first = False
-            output.write(')')
-        elif self.this.kind == Token.PARENTHESES:
-            output.write('(')
-            self.children[0].translate(output)
-            output.write(')')
-        elif self.this.kind == Token.TRIOP:
-            self.children[1].translate(output)
-            output.write(' if ')
-            self.children[0].translate(output)
-            output.write(' else ')
-            self.children[2].translate(output)
-        elif self.this.kind == Token.BINOP:
-            self.children[0].translate(output)
-            output.write(' ')
-            self.this.translate(output)
-            output.write(' ')
-            self.children[1].translate(output)
-        elif self.this.kind == Token.UNIOP:
-            if self.this.spelling == '!':
-                output.write('not ')
-            else:
-                output.write(self.this.spelling)
-            self.children[0].translate(output)
+        translator = _EXPRESSION_TRANSLATORS.get(self.this.kind,
+                                                 Expression._translate_token)
+        translator(self, output)
+
+    def _translate_function(self, output):
+        '''Translate function call.'''
+        self.children[0].translate(output)
+        output.write('(')
+        first = True
+        for child in self.children[1:]:
+            if not first:
+                output.write(', ')
+            child.translate(output)
+            first = False
+        output.write(')')
+
+    def _translate_parentheses(self, output):
+        '''Translate parenthesized expression.'''
+        output.write('(')
+        self.children[0].translate(output)
+        output.write(')')
+
+    def _translate_triop(self, output):
+        '''Translate conditional expression.'''
+        self.children[1].translate(output)
+        output.write(' if ')
+        self.children[0].translate(output)
+        output.write(' else ')
+        self.children[2].translate(output)
+
+    def _translate_binop(self, output):
+        '''Translate binary operator expression.'''
+        self.children[0].translate(output)
+        output.write(' ')
+        self.this.translate(output)
+        output.write(' ')
+        self.children[1].translate(output)
+
+    def _translate_uniop(self, output):
+        '''Translate unary operator expression.'''
+        if self.this.spelling == '!':
+            output.write('not ')
         else:
-            self.this.translate(output)
+            output.write(self.this.spelling)
+        self.children[0].translate(output)
+
+    def _translate_token(self, output):
+        '''Translate leaf expression.'''
+        self.this.translate(output)
 
 
 class Token(namedtuple('Token', 'kind spelling')):
@@ -497,6 +536,9 @@ class Token(namedtuple('Token', 'kind spelling')):
 
     # pylint: disable=W0232,E1101
 
+    # One is created per token/node; do not give each a __dict__.
+    __slots__ = ()
+
     REGEX_TOKEN = re.compile(r'''
             (?P<symbol>[a-zA-Z_]\w*) |
             (?P<string_literal>
@@ -546,38 +588,47 @@ class Token(namedtuple('Token', 'kind spelling')):
     CAT = 'CAT'
     END = 'END'
 
+    # Map named group of REGEX_TOKEN to token kind
+    GROUP_KINDS = {
+        'symbol':                   SYMBOL,
+        'char_literal':             CHAR_LITERAL,
+        'string_literal':           STR_LITERAL,
+        'integer_literal':          INT_LITERAL,
+        'floating_point_literal':   FP_LITERAL,
+        'binary_operator':          BINOP,
+        'parentheses':              PARENTHESES,
+        'misc':                     MISC,
+    }
+
+    # Binary operators that are spelled as keywords in Python
+    BINOP_KEYWORDS = {'&&': 'and', '||': 'or'}
+
     @classmethod
     def get_tokens(cls, c_expr):
         '''Make token list from C expression.'''
         pos = 0
-        while True:
-            match = cls.REGEX_TOKEN.match(c_expr, pos)
-            if not match:
+        group_kinds = cls.GROUP_KINDS
+        for match in cls.REGEX_TOKEN.finditer(c_expr):
+            # Stop at the first character that no token matches, as
+            # finditer would otherwise skip over it.
+            if match.start() != pos:
                 break
             pos = match.end()
-            for gname, kind in (
-                    ('symbol',                  cls.SYMBOL),
-                    ('char_literal',            cls.CHAR_LITERAL),
-                    ('string_literal',          cls.STR_LITERAL),
-                    ('integer_literal',         cls.INT_LITERAL),
-                    ('floating_point_literal',  cls.FP_LITERAL),
-                    ('binary_operator',         cls.BINOP),
-                    ('parentheses',             cls.PARENTHESES),
-                    ('misc',                    cls.MISC)):
-                spelling = match.group(gname)
-                if spelling:
-                    yield cls(kind=kind, spelling=spelling)
-                    break
+            # lastgroup is None for the ignored (unnamed) alternatives.
+            kind = group_kinds.get(match.lastgroup)
+            if kind:
+                yield cls(kind=kind, spelling=match.group())
+        # Do not let a valid prefix pass for the whole expression.
+        if pos != len(c_expr):
+            raise CSyntaxError('Could not tokenize %r' % c_expr[pos:])
         yield cls(kind=cls.END, spelling=None)
 
     def translate(self, output):
         '''Translate this token to Python codes.'''
         if self.kind == self.CHAR_LITERAL:
             output.write('ord(%s)' % self.spelling)
-        elif self.kind == self.BINOP and self.spelling == '&&':
-            output.write('and')
-        elif self.kind == self.BINOP and self.spelling == '||':
-            output.write('or')
+        elif self.kind == self.BINOP and self.spelling in self.BINOP_KEYWORDS:
+            output.write(self.BINOP_KEYWORDS[self.spelling])
         elif self.kind == self.INT_LITERAL or self.kind == self.FP_LITERAL:
             if (self.spelling.startswith('0x') or
                     self.spelling.startswith('0X')):
@@ -593,3 +644,13 @@ class Token(namedtuple('Token', 'kind spelling')):
             output.write(CTYPES_SYMBOLS.get(self.spelling, self.spelling))
         else:
             output.write(self.spelling)
+
+
+# Map expression kind to its translator; the rest are leaf tokens.
+_EXPRESSION_TRANSLATORS = {
+    Token.FUNCTION:     Expression._translate_function,
+    Token.PARENTHESES:  Expression._translate_parentheses,
+    Token.TRIOP:        Expression._translate_triop,
+    Token.BINOP:        Expression._translate_binop,
+    Token.UNIOP:        Expression._translate_uniop,
+}
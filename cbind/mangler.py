@@ -369,6 +369,15 @@ BUILTIN_TYPE_MAP = {
 }
 
 
+# Map type kinds that prefix another type to (code, strip function).
+COMPOUND_TYPE_MAP = {
+    TypeKind.POINTER:           ('P', lambda type_: type_.get_pointee()),
+    TypeKind.LVALUEREFERENCE:   ('R', lambda type_: type_.get_pointee()),
+    TypeKind.RVALUEREFERENCE:   ('O', lambda type_: type_.get_pointee()),
+    TypeKind.COMPLEX:           ('C', lambda type_: type_.get_element_type()),
+}
+
+
 def _type(type_, output):
     '''<type> ::= <builtin-type>
               ::= <function-type>
@@ -421,22 +430,13 @@ def _type(type_, output):
                       ::= Dn    # std::nullptr_t (i.e., decltype(nullptr))
                       ::= u <source-name>   # vendor extended type
     '''
-    while True:
-        # TODO(clchiou): G <type>  # imaginary (C 2000)
-        if type_.kind == TypeKind.POINTER:
-            output.write('P')
-            type_ = type_.get_pointee()
-        elif type_.kind == TypeKind.LVALUEREFERENCE:
-            output.write('R')
-            type_ = type_.get_pointee()
-        elif type_.kind == TypeKind.RVALUEREFERENCE:
-            output.write('O')
-            type_ = type_.get_pointee()
-        elif type_.kind == TypeKind.COMPLEX:
-            output.write('C')
-            type_ = type_.get_element_type()
-        else:
-            break
+    # TODO(clchiou): G <type>  # imaginary (C 2000)
+    compound = COMPOUND_TYPE_MAP.get(type_.kind)
+    while compound:
+        code, strip = compound
+        output.write(code)
+        type_ = strip(type_)
+        compound = COMPOUND_TYPE_MAP.get(type_.kind)
     _cv_qualifiers(type_, output)
     if type_.kind in BUILTIN_TYPE_MAP:
         output.write(BUILTIN_TYPE_MAP[type_.kind])
@@ -8,6 +8,16 @@ from cbind.passes.util import traverse_postorder
 import cbind.annotations as annotations
 
 
+# Map POD declaration kind to the keyword used in generated names
+POD_KIND_NAMES = {
+    CursorKind.STRUCT_DECL: 'struct',
+    CursorKind.CLASS_DECL:  'class',
+    CursorKind.UNION_DECL:  'union',
+}
+
+NON_WORD_PATTERN = re.compile(r'[^\w]')
+
+
 def scan_anonymous_pod(syntax_tree):
     '''Scan anonymous PODs.'''
     traverse_postorder(syntax_tree, _scan_tree)
@@ -38,18 +48,14 @@ def _typedef_pod(tree):
 
 def _real_anonymous_pod(tree):
     '''Generate the name for the POD.'''
-    if tree.original_name:
+    ann = tree.get_annotations()
+    if ann.get(annotations.ORIGINAL_NAME) or tree.spelling:
         return
-    if tree.kind == CursorKind.STRUCT_DECL:
-        kind = 'struct'
-    elif tree.kind == CursorKind.CLASS_DECL:
-        kind = 'class'
-    else:
-        kind = 'union'
+    kind = POD_KIND_NAMES[tree.kind]
+    location = tree.location
     # I can't think of any test cases or real world scenarios
     # that tree.location.file is None...
-    assert tree.location.file
-    filename = re.sub(r'[^\w]', '_', tree.location.file.name)
-    name = '_%s_%s_%d_%d' % (kind, filename,
-                             tree.location.line, tree.location.column)
-    tree.annotate(annotations.ORIGINAL_NAME, name)
+    assert location.file
+    filename = NON_WORD_PATTERN.sub('_', location.file.name)
+    name = '_%s_%s_%d_%d' % (kind, filename, location.line, location.column)
+    ann[annotations.ORIGINAL_NAME] = name
@@ -2,38 +2,55 @@
 
 '''Scan syntax tree for forward declarations.'''
 
+import functools
+
 from cbind.cindex import CursorKind
 from cbind.passes.util import traverse_postorder, strip_type
 import cbind.annotations as annotations
 
 
 def scan_forward_decl(syntax_tree):
-    '''Scan syntax tree for forward declarations.'''
+    '''Scan syntax tree for forward declarations; return True if any.'''
     has_seen = set()
-    traverse_postorder(syntax_tree, lambda tree: _scan_tree(tree, has_seen))
-
-
-def _scan_tree(tree, has_seen):
+    scanned = set()
+    forward_decls = set()
+    traverse_postorder(syntax_tree,
+                       functools.partial(_scan_tree, has_seen=has_seen,
+                                         scanned=scanned,
+                                         forward_decls=forward_decls))
+    for tree in forward_decls:
+        tree.annotate(annotations.FORWARD_DECLARATION, True)
+    return bool(forward_decls)
+
+
+def _scan_tree(tree, has_seen, scanned, forward_decls):
     '''Scan tree for forward declarations.'''
     if tree.is_user_defined_type_decl():
         has_seen.add(tree)
 
     if tree.kind == CursorKind.FUNCTION_DECL:
         for type_ in tree.type.get_argument_types():
-            _scan_type_forward_decl(type_, has_seen)
-        _scan_type_forward_decl(tree.result_type, has_seen)
+            _scan_type_forward_decl(type_, has_seen, scanned, forward_decls)
+        _scan_type_forward_decl(tree.result_type, has_seen, scanned,
+                                forward_decls)
     else:
-        _scan_type_forward_decl(tree.type, has_seen)
+        _scan_type_forward_decl(tree.type, has_seen, scanned, forward_decls)
 
 
-def _scan_type_forward_decl(type_, has_seen):
+def _scan_type_forward_decl(type_, has_seen, scanned, forward_decls):
     '''Scan type for forward declarations.'''
+    # has_seen only grows, so scanning the same type again is a no-op.
+    identity = type_.get_identity()
+    if identity in scanned:
+        return
+    scanned.add(identity)
     if type_.is_user_defined_type():
         tree = type_.get_declaration()
         if tree.is_user_defined_type_decl() and tree not in has_seen:
-            tree.annotate(annotations.FORWARD_DECLARATION, True)
+            forward_decls.add(tree)
         return
 
     stripped_type = strip_type(type_)
     if stripped_type:
-        _scan_type_forward_decl(stripped_type, has_seen)
+        _scan_type_forward_decl(stripped_type, has_seen, scanned,
+                                forward_decls)
@@ -15,22 +15,26 @@ def scan_required_nodes(syntax_tree, check_required):
         if not check_required(tree):
             return
         tree.annotate(annotations.REQUIRED, True)
-        _scan_type_definition(tree.type, todo, visited)
+        _scan_type_definition(tree.type, todo, visited, scanned)
         if tree.is_field_decl():
-            _scan_type_definition(tree.semantic_parent.type, todo, visited)
+            _scan_type_definition(tree.semantic_parent.type, todo, visited,
+                                  scanned)
         elif tree.kind == CursorKind.FUNCTION_DECL:
             if (not tree.type.is_function_variadic() and
                     tree.get_num_arguments() > 0):
                 for arg in tree.get_arguments():
-                    _scan_type_definition(arg.type, todo, visited)
+                    _scan_type_definition(arg.type, todo, visited,
+                                          scanned)
             if tree.result_type.kind != TypeKind.VOID:
-                _scan_type_definition(tree.result_type, todo, visited)
+                _scan_type_definition(tree.result_type, todo, visited,
+                                      scanned)
 
     visited = set()
+    scanned = set()
     todo = []
     traverse_postorder(syntax_tree, _scan_required)
     call_scan_type_definition = lambda tree: \
-        _scan_type_definition(tree.type, todo, visited)
+        _scan_type_definition(tree.type, todo, visited, scanned)
     while todo:
         # Trick is to copy todo and then empty it without creating a new list.
         trees = list(todo)
@@ -40,8 +44,14 @@ def scan_required_nodes(syntax_tree, check_required):
             traverse_postorder(tree, call_scan_type_definition)
 
 
-def _scan_type_definition(type_, todo, visited):
+def _scan_type_definition(type_, todo, visited, scanned):
     '''Scan type definition.'''
+    # Scanning a type always yields the same trees; skip types (like the
+    # "char *" of many prototypes) that have been scanned before.
+    identity = type_.get_identity()
+    if identity in scanned:
+        return
+    scanned.add(identity)
     if type_.is_user_defined_type():
         tree = type_.get_declaration()
         if not tree.is_user_defined_type_decl():
@@ -51,9 +61,9 @@ def _scan_type_definition(type_, todo, visited):
         todo.append(tree)
         visited.add(tree)
         for field in tree.get_field_declaration():
-            _scan_type_definition(field.type, todo, visited)
+            _scan_type_definition(field.type, todo, visited, scanned)
         return
 
     stripped_type = strip_type(type_)
     if stripped_type:
-        _scan_type_definition(stripped_type, todo, visited)
+        _scan_type_definition(stripped_type, todo, visited, scanned)
@@ -7,8 +7,12 @@ from cbind.cindex import CursorKind, TypeKind
 
 def traverse_postorder(syntax_tree, postorder):
     '''Traverse syntax tree post order.'''
-    prune = lambda tree: tree.kind == CursorKind.COMPOUND_STMT
-    syntax_tree.traverse(postorder=postorder, prune=prune)
+    syntax_tree.traverse(postorder=postorder, prune=_is_compound_stmt)
+
+
+def _is_compound_stmt(tree):
+    '''Test if this is a compound statement (a function body).'''
+    return tree.kind == CursorKind.COMPOUND_STMT
 
 
 def strip_type(type_):
@@ -2,32 +2,38 @@
 
 '''Scan syntax tree's use of __va_list_tag.'''
 
-from cbind.passes.util import traverse_postorder, strip_type
+import functools
+
+from cbind.cindex import CursorKind
+from cbind.passes.util import strip_type
 import cbind.annotations as annotations
 
 
 def scan_va_list_tag(syntax_tree):
     '''Scan use of __va_list_tag.'''
-    try:
-        postorder = lambda tree: _scan_tree(tree, syntax_tree)
-        traverse_postorder(syntax_tree, postorder)
-    except StopIteration:
-        pass
+    found = []
+    # Any visiting order finds the same builtin declaration, so scan in
+    # preorder and spare the walk a second stack entry per node.
+    preorder = functools.partial(_scan_tree, root=syntax_tree, found=found)
+    prune = functools.partial(_prune_tree, found=found)
+    syntax_tree.traverse(preorder=preorder, prune=prune)
+
+
+def _prune_tree(tree, found):
+    '''Do not descend into function bodies, or anywhere once found.'''
+    return bool(found) or tree.kind == CursorKind.COMPOUND_STMT
 
 
-def _scan_tree(tree, root):
+def _scan_tree(tree, root, found):
     '''Scan this tree for __va_list_tag.'''
     if not tree.get_annotation(annotations.REQUIRED, False):
         return
     type_ = tree.type
-    while True:
-        if tree.name == '__va_list_tag':
-            root.annotate(annotations.USE_VA_LIST_TAG, tree)
-            raise StopIteration()  # Return from deeply recursion
-        while True:
-            type_ = strip_type(type_)
-            if not type_:
-                return
-            if type_.is_user_defined_type():
-                tree = type_.get_declaration()
-                break
+    while tree.name != '__va_list_tag':
+        type_ = strip_type(type_)
+        if not type_:
+            return
+        if type_.is_user_defined_type():
+            tree = type_.get_declaration()
+    root.annotate(annotations.USE_VA_LIST_TAG, tree)
+    found.append(tree)
@@ -7,6 +7,7 @@ from os.path import basename
 import logging
 
 import cbind.annotations as annotations
+from cbind.compatibility import intern_str
 from cbind.cindex import (Index, Cursor, CursorKind, Diagnostic,
                           Type, TypeKind, LinkageKind)
 
@@ -16,6 +17,7 @@ class SyntaxTreeForest(list):
 
     def __init__(self):
         '''Initialize the object.'''
+        # Keyed by node hash, which is also what node equality compares.
         self.annotation_table = defaultdict(dict)
         super(SyntaxTreeForest, self).__init__()
 
@@ -27,13 +29,22 @@ class SyntaxTreeForest(list):
         return syntax_tree
 
 
-def _make_subtree_iterator(iter_cursors):
-    '''Create wrapper of cursor iterator.'''
-    def wrapper(self):
-        '''Wrapper of cursor iterator.'''
-        for cursor in iter_cursors(self.cursor):
-            yield SyntaxTree(cursor, None, self.annotation_table)
-    return wrapper
+def _make_subtree_getter(iter_cursors, cache_name):
+    '''Create getter of sub-trees.'''
+    def getter(self):
+        '''Return a tuple of sub-trees.'''
+        # Visiting children goes through libclang callbacks; do it once
+        # per node and keep the sub-trees (and their cached properties).
+        # Every pass walks the whole tree, so this keeps a wrapper for
+        # every cursor, system headers included, alive for as long as the
+        # SyntaxTreeForest is: memory traded for not re-visiting cursors.
+        subtrees = getattr(self, cache_name)
+        if subtrees is None:
+            subtrees = tuple(SyntaxTree(cursor, None, self.annotation_table)
+                             for cursor in iter_cursors(self.cursor))
+            setattr(self, cache_name, subtrees)
+        return subtrees
+    return getter
 
 
 class SyntaxTree:
@@ -45,7 +56,6 @@ class SyntaxTree:
         enum_type
         enum_value
         get_bitfield_width
-        get_num_arguments
         is_bitfield
         is_definition
         is_static_method
@@ -119,6 +129,10 @@ class SyntaxTree:
         self.cursor = cursor
         self.translation_unit = translation_unit
         self.annotation_table = annotation_table
+        self._hash = None
+        self._children = None
+        self._arguments = None
+        self._fields = None
 
     def __eq__(self, other):
         '''Implement __eq__().'''
@@ -130,15 +144,23 @@ class SyntaxTree:
 
     def __hash__(self):
         '''Compute hash of the cursor.'''
+        # Cursors are immutable, and hashing is on the path of every
+        # annotation lookup; compute it only once per node.
+        if self._hash is None:
+            self._hash = self._compute_hash()
+        return self._hash
+
+    def _compute_hash(self):
+        '''Compute hash of the cursor without the cache.'''
         cursor = self.cursor
         if cursor.spelling:
-            return hash('%s:%s' % (cursor.kind, cursor.spelling))
-        if cursor.location.file:
-            filename = basename(cursor.location.file.name)
+            return hash((cursor.kind, cursor.spelling))
+        location = cursor.location
+        if location.file:
+            filename = basename(location.file.name)
         else:
             filename = '?'
-        return hash('%s:%s:%d' %
-                    (cursor.kind, filename, cursor.location.offset))
+        return hash((cursor.kind, filename, location.offset))
 
     def __getattr__(self, name):
         '''Get property.'''
@@ -147,21 +169,37 @@ class SyntaxTree:
             message = '\'%s\' object has no attribute \'%s\'' % (cls, name)
             raise AttributeError(message)
         attr = getattr(self.cursor, name)
-        if isinstance(attr, Cursor):
+        if name == 'spelling' and attr:
+            # The same identifiers recur all over the tree (declarations,
+            # references, field names); share one string object.
+            attr = intern_str(attr)
+        elif isinstance(attr, Cursor):
             attr = SyntaxTree(attr, None, self.annotation_table)
         elif isinstance(attr, Type):
             attr = SyntaxTreeType(attr, self)
+        # Cursor properties are immutable; memoize so that next lookup is
+        # a plain instance attribute and does not reach __getattr__.
+        setattr(self, name, attr)
         return attr
 
     @property
     def original_name(self):
         '''Return original_name of this node.'''
-        return self.get_annotation(annotations.ORIGINAL_NAME, self.spelling)
+        return self._get_original_name(self.get_annotations())
 
     @property
     def name(self):
         '''Return name of this node.'''
-        return self.get_annotation(annotations.NAME, self.original_name)
+        ann = self.get_annotations()
+        if annotations.NAME in ann:
+            return ann[annotations.NAME]
+        return self._get_original_name(ann)
+
+    def _get_original_name(self, ann):
+        '''Return original_name from annotations of this node.'''
+        if annotations.ORIGINAL_NAME in ann:
+            return ann[annotations.ORIGINAL_NAME]
+        return self.spelling
 
     def is_external_linkage(self):
         '''Test if linkage is external.'''
@@ -179,16 +217,31 @@ class SyntaxTree:
         '''Test if this is a field declaration.'''
         return self.kind in self.UDT_FIELD_DECL
 
-    get_children = _make_subtree_iterator(Cursor.get_children)
-    get_arguments = _make_subtree_iterator(Cursor.get_arguments)
+    _get_children = _make_subtree_getter(Cursor.get_children, '_children')
+    _get_arguments = _make_subtree_getter(Cursor.get_arguments, '_arguments')
+
+    def get_children(self):
+        '''Get direct sub-trees.'''
+        return iter(self._get_children())
+
+    def get_arguments(self):
+        '''Get arguments of a function declaration.'''
+        return iter(self._get_arguments())
+
+    def get_num_arguments(self):
+        '''Get number of arguments of a function declaration.'''
+        return len(self._get_arguments())
 
     def get_field_declaration(self):
         '''Get direct sub-trees that are field declaration.'''
-        if self.kind not in self.HAS_FIELD_DECL:
-            return
-        for child_tree in self.get_children():
-            if child_tree.kind == CursorKind.FIELD_DECL:
-                yield child_tree
+        if self._fields is None:
+            fields = ()
+            if self.kind in self.HAS_FIELD_DECL:
+                fields = tuple(child_tree
+                               for child_tree in self._get_children()
+                               if child_tree.kind == CursorKind.FIELD_DECL)
+            self._fields = fields
+        return iter(self._fields)
 
     def get_method(self):
         '''Get member methods of a class.'''
@@ -200,22 +253,40 @@ class SyntaxTree:
 
     def traverse(self, preorder=None, postorder=None, prune=None):
         '''Traverse the syntax tree.'''
-        if prune and prune(self):
-            return
-        if preorder:
-            preorder(self)
-        for child_tree in self.get_children():
-            child_tree.traverse(preorder, postorder, prune)
-        if postorder:
-            postorder(self)
+        # Walk with an explicit stack rather than recursion so that deeply
+        # nested sources do not hit the interpreter recursion limit.
+        stack = [(self, False)]
+        while stack:
+            tree, visited = stack.pop()
+            if visited:
+                postorder(tree)
+                continue
+            if prune and prune(tree):
+                continue
+            if preorder:
+                preorder(tree)
+            if postorder:
+                stack.append((tree, True))
+            children = list(tree.get_children())
+            children.reverse()
+            stack.extend((child_tree, False) for child_tree in children)
 
     def annotate(self, key, value):
         '''Annotate this node.'''
-        self.annotation_table[self][key] = value
+        self.annotation_table[hash(self)][key] = value
 
     def get_annotation(self, key, default):
         '''Get the annotation.'''
-        return self.annotation_table[self].get(key, default)
+        # Do not go through the defaultdict here; a read should not leave
+        # an empty annotation dict behind for every node it touches.
+        ann = self.annotation_table.get(hash(self))
+        if ann is None:
+            return default
+        return ann.get(key, default)
+
+    def get_annotations(self):
+        '''Get the (mutable) dict of all annotations of this node.'''
+        return self.annotation_table[hash(self)]
 
 
 def _make_type_getter(getter):
@@ -264,6 +335,7 @@ class SyntaxTreeType:
             message = '\'%s\' object has no attribute \'%s\'' % (cls, name)
             raise AttributeError(message)
         attr = getattr(self.c_type, name)
+        setattr(self, name, attr)
         return attr
 
     def get_declaration(self):
@@ -287,6 +359,11 @@ class SyntaxTreeType:
         return tuple(SyntaxTreeType(c_type, self.syntax_tree)
                      for c_type in self.c_type.argument_types())
 
+    def get_identity(self):
+        '''Return a hashable identity of the underlying clang type.'''
+        data = self.c_type.data
+        return (self.kind, data[0], data[1])
+
     def is_user_defined_type(self):
         '''Test if this type is user-defined.'''
         return self.kind in self.UDT
@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 
-from distutils.core import setup
+try:
+    from setuptools import setup
+except ImportError:
+    from distutils.core import setup
 
 setup(
     name='ctypes-binding-generator',
@@ -10,6 +13,6 @@ setup(
     author_email='clchiou@gmail.com',
     license='GNU GPLv3',
     url='https://github.com/clchiou/ctypes-binding-generator',
-    packages=['cbind', 'cbind/codegen', 'cbind/passes'],
+    packages=['cbind', 'cbind.codegen', 'cbind.passes'],
     scripts=['bin/cbind'],
 )
@@ -4,6 +4,7 @@ import unittest
 import test_builtin
 import test_cindex
 import test_class
+import test_codegen
 import test_config
 import test_cparser
 import test_enum
@@ -21,6 +22,7 @@ suite_all = unittest.TestSuite([
     unittest.TestLoader().loadTestsFromModule(test_builtin),
     unittest.TestLoader().loadTestsFromModule(test_cindex),
     unittest.TestLoader().loadTestsFromModule(test_class),
+    unittest.TestLoader().loadTestsFromModule(test_codegen),
     unittest.TestLoader().loadTestsFromModule(test_config),
     unittest.TestLoader().loadTestsFromModule(test_cparser),
     unittest.TestLoader().loadTestsFromModule(test_enum),
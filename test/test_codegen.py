@@ -0,0 +1,82 @@
+import unittest
+import helper
+import cbind.annotations as annotations
+import cbind.codegen.helper
+from cbind.codegen import CodeGen
+from cbind.compatibility import StringIO
+from cbind.ctypes_binding import CtypesBindingGenerator
+
+
+# C++ so that uses of foo are not elaborated types
+CPP_CODE = '''
+extern "C" {
+struct foo { int a; };
+foo *f(foo x);
+}
+'''
+
+
+def make_python_code(name):
+    return '''
+class {name}(Structure):
+    pass
+{name}._fields_ = [('a', c_int)]
+
+f = _lib.f
+f.argtypes = [{name}]
+f.restype = POINTER({name})
+    '''.format(name=name)
+
+
+class TestTypeCache(unittest.TestCase):
+
+    def setUp(self):
+        CodeGen.ENABLE_CPP = False
+        CodeGen.ASSERT_LAYOUT = False
+
+    @staticmethod
+    def parse(new_name=None):
+        cbgen = CtypesBindingGenerator()
+        cbgen.parse('input.cpp', contents=StringIO(CPP_CODE))
+        if new_name:
+            def rename(tree):
+                if tree.spelling == 'foo':
+                    tree.annotate(annotations.NAME, new_name)
+            cbgen.syntax_tree_forest[0].traverse(preorder=rename)
+        return cbgen
+
+    def assert_generate(self, cbgen, python_code):
+        output = StringIO()
+        cbgen.generate(output)
+        gen_code = output.getvalue()
+        error_message = helper.prepare_error_message(python_code, gen_code)
+        self.assertTrue(helper.compare_codes(gen_code, python_code),
+                        error_message)
+
+    def test_rename_after_parse(self):
+        self.assert_generate(self.parse(new_name='bar'),
+                             make_python_code('bar'))
+
+    def test_multiple_generators(self):
+        cbgen = self.parse()
+        self.assert_generate(cbgen, make_python_code('foo'))
+        del cbgen
+        self.assert_generate(self.parse(new_name='bar'),
+                             make_python_code('bar'))
+
+    def test_nested_generators(self):
+        cbgen = self.parse()
+        cbgen.codegen.enable_type_cache(True)
+        try:
+            type_cache = cbind.codegen.helper._TYPE_CACHE
+            self.assert_generate(self.parse(new_name='bar'),
+                                 make_python_code('bar'))
+            # The other generator must not take our cache away.
+            self.assertIs(cbind.codegen.helper._TYPE_CACHE, type_cache)
+        finally:
+            cbgen.codegen.enable_type_cache(False)
+        self.assertIsNone(cbind.codegen.helper._TYPE_CACHE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,7 @@
 import unittest
 
 from cbind.compatibility import StringIO
-from cbind.macro import Token, Expression, Parser
+from cbind.macro import Token, Expression, Parser, CSyntaxError
 
 
 class TestToken(unittest.TestCase):
@@ -55,6 +55,11 @@ class TestToken(unittest.TestCase):
                 Token(Token.END, None),
                 )
 
+    def test_tokenizer_unknown_character(self):
+        for c_expr in ('1 @ 2', '1 `', '@'):
+            with self.assertRaises(CSyntaxError):
+                tuple(Token.get_tokens(c_expr))
+
     def run_token_translate(self, kind, spelling, answer):
         output = StringIO()
         Token(kind, spelling).translate(output)
@@ -116,6 +121,34 @@ class TestExpression(unittest.TestCase):
                       ('!', ('!', '1')),
                       'not not 1')
 
+    def test_binary_operator_grouping(self):
+        # Tighter binding operators nest deeper.
+        self.run_test('a + b * c', ('+', 'a', ('*', 'b', 'c')))
+        self.run_test('a * b + c', ('+', ('*', 'a', 'b'), 'c'))
+        self.run_test('a * b + c * d - e',
+                      ('+',
+                          ('*', 'a', 'b'),
+                          ('-', ('*', 'c', 'd'), 'e')
+                      )
+                     )
+        # Operators of the same level nest to the right; the translated
+        # Python groups them from the left, as C does.
+        self.run_test('a - b - c', ('-', 'a', ('-', 'b', 'c')))
+        self.run_test('a << b << c', ('<<', 'a', ('<<', 'b', 'c')))
+        # Logical operators bind looser than bitwise operators.
+        self.run_test('a | b && c',
+                      ('&&', ('|', 'a', 'b'), 'c'),
+                      'a | b and c')
+        self.run_test('a && b | c',
+                      ('&&', 'a', ('|', 'b', 'c')),
+                      'a and b | c')
+        self.run_test('a || b ^ c && d & e',
+                      ('||',
+                          'a',
+                          ('&&', ('^', 'b', 'c'), ('&', 'd', 'e'))
+                      ),
+                      'a or b ^ c and d & e')
+
     def test_function_call(self):
         self.run_test('f(1, 2, 3)', ('()', 'f', '1', '2', '3'))
         self.run_test('f(x)', ('()', 'f', 'x'))
@@ -1,6 +1,6 @@
 import unittest
 import helper
-from cbind.macro import MacroException
+from cbind.macro import MacroException, MacroSymbol
 
 
 class TestMacro(helper.TestMacroGenerator):
@@ -81,6 +81,49 @@ C = lambda x, y: x * y
 D = lambda x, y, z: x + y - z
         ''')
 
+    def test_macro_binary_operator(self):
+        self.run_test('''
+#define A 1 + 2 * 3
+#define B 1 * 2 + 3
+#define C 8 - 4 - 2
+#define D 1 << 2 << 3
+#define E(x, y, z) x | y && z
+#define F(x, y, z) x || y ^ z && x & y
+        ''', '''
+A = 1 + 2 * 3
+B = 1 * 2 + 3
+C = 8 - 4 - 2
+D = 1 << 2 << 3
+E = lambda x, y, z: x | y and z
+F = lambda x, y, z: x or y ^ z and x & y
+        ''')
+
+    def test_macro_function_arguments(self):
+        self.run_test('''
+#define A( ) 0
+#define B(x, ...) x
+#define C(...) 0
+#define D(args...) args
+#define E(x /* comment */) x
+#define F(x) B(x, 1)
+#define G (1)
+        ''', '''
+A = lambda : 0
+F = lambda x: x
+G = (1)
+        ''')
+
+    def test_macro_unknown_character(self):
+        # A macro with a character the tokenizer does not know is skipped
+        # rather than translated up to that character.
+        self.run_test('''
+#define A 1 @ 2
+#define B 1 `
+#define C 3
+        ''', '''
+C = 3
+        ''')
+
     def test_syntax_error(self):
         with open('/dev/null', 'w') as stderr:
             with self.assertRaises(MacroException):
@@ -90,5 +133,23 @@ D = lambda x, y, z: x + y - z
                 ''', stderr=stderr)
 
 
+class TestMacroArguments(unittest.TestCase):
+
+    def test_split_arguments(self):
+        split = MacroSymbol._split_arguments
+        self.assertEqual(split(''), ())
+        self.assertEqual(split('  '), ())
+        self.assertEqual(split('x'), ('x',))
+        self.assertEqual(split(' x ,y '), ('x', 'y'))
+        # Malformed
+        self.assertIsNone(split('x,'))
+        self.assertIsNone(split('x, ,y'))
+        self.assertIsNone(split('x y'))
+        # Variadic
+        self.assertIsNone(split('...'))
+        self.assertIsNone(split('x, ...'))
+        self.assertIsNone(split('args...'))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -29,6 +29,82 @@ func2 = _lib.func2
 func2.argtypes = [foo]
         ''')
 
+    def test_static_function(self):
+        # A static function is not bound, and does not hide an external
+        # function of the same name in another source.
+        self.run_test([('/a/b/c/src.c', '''
+static int f(void) { return 0; }
+int g(void);
+        '''), ('/d/e/f/src.c', '''
+void f(double x);
+        ''')], '''
+g = _lib.g
+g.restype = c_int
+
+f = _lib.f
+f.argtypes = [c_double]
+        ''')
+
+    def test_forward_declaration(self):
+        # Only the first source needs forward declarations; the second
+        # source must not switch them off.
+        self.run_test([('/a/b/c/src.cpp', '''
+struct foo {
+    struct bar {
+        foo *p;
+    };
+    bar b;
+};
+        '''), ('/d/e/f/src.cpp', '''
+struct baz {
+    int x;
+};
+        ''')], '''
+class foo(Structure):
+    pass
+class bar(Structure):
+    pass
+bar._fields_ = [('p', POINTER(foo))]
+
+foo._fields_ = [('b', bar)]
+
+class baz(Structure):
+    pass
+baz._fields_ = [('x', c_int)]
+        ''')
+
+    def test_va_list_tag(self):
+        # __va_list_tag is defined once, before any source uses it.
+        self.run_test([('/a/b/c/src.c', '''
+int g(void);
+        '''), ('/d/e/f/src.c', '''
+typedef __builtin_va_list va_list;
+void f(va_list ap);
+        '''), ('/g/h/i/src.c', '''
+typedef __builtin_va_list my_list;
+void h(my_list ap);
+        ''')], '''
+class __va_list_tag(Structure):
+    pass
+__va_list_tag._fields_ = [('gp_offset', c_uint),
+                          ('fp_offset', c_uint),
+                          ('overflow_arg_area', c_void_p),
+                          ('reg_save_area', c_void_p)]
+
+g = _lib.g
+g.restype = c_int
+
+va_list = (__va_list_tag * 1)
+
+f = _lib.f
+f.argtypes = [(__va_list_tag * 1)]
+
+my_list = (__va_list_tag * 1)
+
+h = _lib.h
+h.argtypes = [(__va_list_tag * 1)]
+        ''', args=['-target', 'x86_64-linux-gnu'])
+
 
 if __name__ == '__main__':
     unittest.main()
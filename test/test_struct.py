@@ -183,6 +183,44 @@ assert blob2.n.offset == 12, 'blob2.n.offset == 12'
 assert blob2.o.offset == 16, 'blob2.o.offset == 16'
         ''', assert_layout=True)
 
+    def test_unnamed_bitfield(self):
+        self.run_test('''
+struct foo {
+    int i : 1;
+    int : 3;
+    int j : 2;
+    int : 0;
+    int k;
+};
+        ''', '''
+class foo(Structure):
+    pass
+foo._fields_ = [('i', c_int, 1),
+                ('_unnamed_bitfield_0', c_int, 3),
+                ('j', c_int, 2),
+                ('k', c_int)]
+assert foo.i.offset == 0, 'foo.i.offset == 0'
+assert foo.j.offset == 0, 'foo.j.offset == 0'
+assert foo.k.offset == 4, 'foo.k.offset == 4'
+        ''', assert_layout=True)
+
+    def test_leading_unnamed_bitfield(self):
+        # The storage unit of j is not known when padding starts the run.
+        self.run_test('''
+struct foo {
+    int i;
+    int : 3;
+    int j : 2;
+};
+        ''', '''
+class foo(Structure):
+    pass
+foo._fields_ = [('i', c_int),
+                ('_unnamed_bitfield_0', c_int, 3),
+                ('j', c_int, 2)]
+assert foo.i.offset == 0, 'foo.i.offset == 0'
+        ''', assert_layout=True)
+
 
 if __name__ == '__main__':
     unittest.main()